@@ -1,12 +1,37 @@
+import time
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.models.user import UserInDB
 from app.core.database import db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Resolved users keyed by token subject (email). Entries never outlive the
+# token that loaded them and are dropped through invalidate_user().
+principal_cache = TTLCache(
+    "principals", settings.principal_cache_size, settings.principal_cache_ttl_seconds
+)
+# Decoded claims keyed by the raw token, so a repeat token skips signature checks.
+token_cache = (
+    TTLCache("tokens", settings.token_cache_size, settings.principal_cache_ttl_seconds)
+    if settings.token_cache_enabled
+    else None
+)
+
+def _seconds_until_expiry(payload: dict) -> Optional[float]:
+    exp = payload.get("exp")
+    if exp is None:
+        return None
+    return exp - time.time()
+
+def invalidate_user(email: str):
+    """Call whenever a user record changes so the next request reloads it."""
+    principal_cache.pop(email)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -14,17 +39,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
+    payload = token_cache.get(token) if token_cache is not None else None
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        except JWTError:
             raise credentials_exception
-    except JWTError:
+        if token_cache is not None:
+            token_cache.set(token, payload, ttl=_seconds_until_expiry(payload))
+
+    email: str = payload.get("sub")
+    if email is None:
         raise credentials_exception
 
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
     user = await db.users.find_one({"email": email})
     if user is None:
         raise credentials_exception
 
     user["id"] = str(user["_id"])
-    return UserInDB(**user)
+    principal = UserInDB(**user)
+    principal_cache.set(email, principal, ttl=_seconds_until_expiry(payload))
+    return principal
@@ -0,0 +1,239 @@
+# app/core/changes.py
+"""
+Inventory change feed for WebSocket clients.
+
+One ChangeWatcher per worker tails a single change stream over the inventory
+and sales collections and fans compact deltas out to every subscriber:
+
+    {"type": "quantity", "item_id": "...", "quantity": 7, "token": "..."}
+    {"type": "sales", "item_id": "...", "date": "YYYY-MM-DD", "count": 12, "token": "..."}
+    {"type": "item", "item_id": "...", "fields": {"price": 4.5}, "token": "..."}
+    {"type": "created" | "deleted", "item_id": "...", "token": "..."}
+    {"type": "reset"}  # events were lost; refetch state over HTTP
+
+Deltas carry absolute values, so a slow client's queue coalesces them per key
+without losing state; only when a client falls more than its queue bound
+behind is it sent "reset". A reconnecting client passes the last token it saw
+and is caught up from the change stream before going live.
+
+The watcher also invalidates this worker's item cache for changes made by
+other workers.
+
+Change streams need a replica set. A single node is enough for local testing:
+    mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval "rs.initiate()"
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Set
+from pymongo.errors import OperationFailure, PyMongoError
+from app.core.config import settings
+from app.core.database import db
+from app.core.item_cache import item_cache
+from app.core.serialization import ITEM_FIELDS
+
+logger = logging.getLogger(__name__)
+
+PIPELINE = [
+    {"$match": {
+        "ns.coll": {"$in": ["inventory", "sales"]},
+        "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+    }},
+]
+# Server errors meaning the stream cannot be resumed from the token given.
+_UNRESUMABLE = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+_NOT_SUPPORTED = 40573  # change streams on a standalone server
+
+RESET = {"type": "reset"}
+
+def _token(change: dict) -> str:
+    return change["_id"]["_data"]
+
+def _item_deltas(change: dict) -> list:
+    item_id = str(change["documentKey"]["_id"])
+    op = change["operationType"]
+    if op == "delete":
+        return [{"type": "deleted", "item_id": item_id}]
+    if op in ("insert", "replace"):
+        doc = change.get("fullDocument") or {}
+        kind = "created" if op == "insert" else "quantity"
+        return [{"type": kind, "item_id": item_id, "quantity": doc.get("quantity")}]
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    deltas = []
+    if "quantity" in updated:
+        deltas.append({"type": "quantity", "item_id": item_id, "quantity": updated["quantity"]})
+    fields = {f: updated[f] for f in ITEM_FIELDS if f in updated and f != "quantity"}
+    if fields:
+        deltas.append({"type": "item", "item_id": item_id, "fields": fields})
+    return deltas
+
+def _sales_deltas(change: dict) -> list:
+    if change["operationType"] == "delete":
+        return []  # buckets are only deleted together with their item
+    item_id, month = change["documentKey"]["_id"].split(":")
+    if change["operationType"] in ("insert", "replace"):
+        days = (change.get("fullDocument") or {}).get("days", {})
+        removed = []
+    else:
+        description = change.get("updateDescription", {})
+        days, removed = {}, []
+        for path, value in description.get("updatedFields", {}).items():
+            if path == "days":  # pipeline updates may report the whole map
+                days.update(value)
+            elif path.startswith("days."):
+                days[path[5:]] = value
+        removed = [p[5:] for p in description.get("removedFields", []) if p.startswith("days.")]
+    deltas = [
+        {"type": "sales", "item_id": item_id, "date": f"{month}-{day}", "count": count}
+        for day, count in days.items()
+    ]
+    deltas += [
+        {"type": "sales", "item_id": item_id, "date": f"{month}-{day}", "count": 0}
+        for day in removed
+    ]
+    return deltas
+
+def to_deltas(change: dict) -> list:
+    if change["ns"]["coll"] == "inventory":
+        deltas = _item_deltas(change)
+    else:
+        deltas = _sales_deltas(change)
+    token = _token(change)
+    for delta in deltas:
+        delta["token"] = token
+    return deltas
+
+class Subscriber:
+    """One client's bounded, coalescing send queue."""
+
+    def __init__(self, item_ids: Optional[Set[str]], max_pending: int):
+        self.item_ids = item_ids
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    @staticmethod
+    def _key(delta: dict) -> tuple:
+        return delta["type"], delta.get("item_id"), delta.get("date")
+
+    def wants(self, delta: dict) -> bool:
+        return not self.item_ids or delta.get("item_id") in self.item_ids
+
+    def push(self, delta: dict, replace: bool = True):
+        if delta is RESET:
+            self._pending.clear()
+            self._overflowed = True
+        elif self.wants(delta):
+            key = self._key(delta)
+            if key in self._pending:
+                if not replace:
+                    return  # a newer value for this key is already queued
+                del self._pending[key]
+            self._pending[key] = delta
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self._overflowed = True
+        self._ready.set()
+
+    async def next_batch(self) -> list:
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        if self._overflowed:
+            self._overflowed = False
+            batch.insert(0, RESET)
+        return batch
+
+class ChangeWatcher:
+    def __init__(self, history: int, client_queue: int):
+        self.history = history
+        self.client_queue = client_queue
+        self._subscribers: Set[Subscriber] = set()
+        self._resume_token = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with db.watch(PIPELINE, resume_after=self._resume_token) as stream:
+                    async for change in stream:
+                        self._resume_token = change["_id"]
+                        self._publish(change)
+            except OperationFailure as exc:
+                if exc.code == _NOT_SUPPORTED:
+                    logger.error("Change streams unavailable (not a replica set); inventory stream disabled")
+                    return
+                if exc.code in _UNRESUMABLE:
+                    logger.warning("Change stream history lost; resetting subscribers")
+                    self._resume_token = None
+                    self._broadcast(RESET)
+                    item_cache.clear()
+                else:
+                    logger.warning("Change stream failed: %s; retrying", exc)
+                await asyncio.sleep(1)
+            except PyMongoError as exc:
+                logger.warning("Change stream interrupted: %s; resuming", exc)
+                await asyncio.sleep(1)
+
+    def _publish(self, change: dict):
+        if change["ns"]["coll"] == "inventory":
+            item_id = str(change["documentKey"]["_id"])
+            if change["operationType"] == "insert":
+                item_cache.invalidate_pages()
+            else:
+                item_cache.invalidate_item(item_id)
+        for delta in to_deltas(change):
+            self._broadcast(delta)
+
+    def _broadcast(self, delta: dict):
+        for subscriber in self._subscribers:
+            subscriber.push(delta)
+
+    async def subscribe(self, item_ids: Optional[Set[str]] = None, resume_after: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(item_ids, self.client_queue)
+        # Go live first so nothing falls between the catch-up and the live feed.
+        self._subscribers.add(subscriber)
+        if resume_after:
+            await self._catch_up(subscriber, resume_after)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def _catch_up(self, subscriber: Subscriber, token: str):
+        """Replay what the client missed since `token`, capped at `history` events."""
+        replayed = 0
+        try:
+            async with db.watch(PIPELINE, resume_after={"_data": token}) as stream:
+                while replayed < self.history:
+                    change = await stream.try_next()
+                    if change is None:
+                        return
+                    replayed += 1
+                    for delta in to_deltas(change):
+                        # Live deltas queued meanwhile are newer; keep them.
+                        subscriber.push(delta, replace=False)
+        except PyMongoError as exc:
+            logger.info("Cannot resume client stream from %s: %s", token, exc)
+        subscriber.push(RESET)
+
+watcher = ChangeWatcher(settings.inventory_stream_history, settings.inventory_stream_client_queue)
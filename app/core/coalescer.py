@@ -0,0 +1,224 @@
+# app/core/coalescer.py
+"""
+Write coalescing for hot-item sales (opt-in: SALES_COALESCE_WINDOW_MS > 0).
+
+Instead of one guarded $inc + find per sale, the worker leases a block of
+stock from an item with a single guarded update (quantity >= lease) and then
+sells from that local reservation without touching Mongo. Every window the
+buffered counts are flushed as one $inc per item/date into the sales buckets,
+and unsold leased stock is handed back to the item.
+
+A sale is only accepted against stock already removed from the item in Mongo,
+so nothing accepted here can oversell after the flush. While a lease is held
+the stored quantity is lower than the true stock by the unsold part of the
+lease (at most SALES_COALESCE_LEASE per item per worker); the API answers with
+the true figure for the item it just sold.
+
+Manual overrides (set_quantity, PUT) bump the item's `stock_epoch`. A lease
+remembers the epoch it was taken at and hands unsold stock back only while
+the item is still at that epoch, so stock leased before an override, by this
+or any other worker, is never added on top of the new value.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core import sales
+from app.core.config import settings
+from app.core.database import db
+from app.core.item_cache import item_cache
+
+logger = logging.getLogger(__name__)
+
+def _epoch(doc: dict) -> int:
+    return doc.get("stock_epoch", 0)
+
+def _epoch_filter(epoch: int):
+    # Items never overridden have no stock_epoch field yet.
+    return {"$in": [None, 0]} if epoch == 0 else epoch
+
+class _Lease:
+    __slots__ = ("lock", "available", "doc", "pending", "closed")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.available = 0          # leased from Mongo, not yet sold
+        self.doc: Optional[dict] = None  # item as returned by the last lease
+        self.pending: Dict[str, int] = defaultdict(int)  # date -> units sold
+        self.closed = False
+
+class SalesCoalescer:
+    def __init__(self, window_ms: int, lease_size: int):
+        self.window = window_ms / 1000
+        self.lease_size = lease_size
+        self._leases: Dict[ObjectId, _Lease] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._flushes: Set[asyncio.Future] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # The flusher is never cancelled: a flush in progress has already taken
+        # the buffer, so it is left to finish (or requeue) before the final one.
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final sales flush failed; buffered sales were not written")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Sales flush failed; will retry next window")
+
+    async def _take(self, obj: ObjectId, units: int) -> Optional[dict]:
+        return await db.inventory.find_one_and_update(
+            {"_id": obj, "quantity": {"$gte": units}},
+            {"$inc": {"quantity": -units, "version": 1}},
+            projection={"sales": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def sell(self, obj: ObjectId, sales_date: str, change: int) -> Optional[dict]:
+        """
+        Record `change` (> 0) units sold. Returns the item with its effective
+        quantity, or None when the item is missing or out of stock.
+        """
+        while True:
+            lease = self._leases.setdefault(obj, _Lease())
+            async with lease.lock:
+                if lease.closed:
+                    continue  # flushed while we waited; use the fresh lease
+                while lease.available < change:
+                    need = change - lease.available
+                    grab = max(need, self.lease_size)
+                    doc = await self._take(obj, grab)
+                    if doc is None and grab > need:
+                        grab = need
+                        doc = await self._take(obj, grab)
+                    if doc is None:
+                        return None
+                    item_cache.invalidate_item(str(obj))
+                    if lease.doc is not None and _epoch(doc) != _epoch(lease.doc):
+                        # Overridden since the last lease: what was left of it is void.
+                        lease.available = 0
+                    lease.available += grab
+                    lease.doc = doc
+                lease.available -= change
+                lease.pending[sales_date] += change
+                return {**lease.doc, "quantity": lease.doc["quantity"] + lease.available}
+
+    async def release(self, obj: ObjectId):
+        """Flush one item now, e.g. before its quantity is overwritten."""
+        lease = self._leases.pop(obj, None)
+        if lease is not None:
+            await self._flush_shielded({obj: lease})
+
+    async def flush(self):
+        leases, self._leases = self._leases, {}
+        if leases:
+            await self._flush_shielded(leases)
+
+    async def _flush_shielded(self, leases: Dict[ObjectId, _Lease]):
+        # Once taken out of self._leases the buffer exists only in this flush,
+        # so it runs to completion even if the caller is cancelled.
+        flush = asyncio.ensure_future(self._flush_leases(leases))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+        await asyncio.shield(flush)
+
+    async def _flush_leases(self, leases: Dict[ObjectId, _Lease]):
+        returns, sold, docs = {}, [], {}
+        for obj, lease in leases.items():
+            async with lease.lock:
+                lease.closed = True
+                docs[obj] = lease.doc
+                if lease.available:
+                    returns[obj] = lease.available
+                sold.extend((obj, d, units) for d, units in lease.pending.items())
+
+        # Only definite failures go back into the buffer: an update the server
+        # rejected (writeErrors) was not applied. After any other error,
+        # cancellation included, the write may have been applied, and retrying
+        # an $inc could apply it twice. So stock whose return is in doubt counts
+        # as returned (losing it is safe, returning it twice is not), and sales
+        # counts in doubt are logged for a summary rebuild, not written again.
+        if returns:
+            try:
+                await db.inventory.bulk_write([
+                    UpdateOne(
+                        {"_id": obj, "stock_epoch": _epoch_filter(_epoch(docs[obj]))},
+                        {"$inc": {"quantity": units, "version": 1}},
+                    )
+                    for obj, units in returns.items()
+                ], ordered=False)
+            except BulkWriteError as exc:
+                failed = {err["index"] for err in exc.details.get("writeErrors", [])}
+                unreturned = {obj: u for i, (obj, u) in enumerate(returns.items()) if i in failed}
+                await self._requeue(docs, unreturned, sold)
+                raise
+            except BaseException:
+                logger.warning("Returning leased stock may have failed; not retried: %s", returns)
+                await self._requeue(docs, {}, sold)
+                raise
+            finally:
+                for obj in returns:
+                    item_cache.invalidate_item(str(obj))
+
+        if sold:
+            failed, error = set(), None
+            try:
+                await db.sales.bulk_write(
+                    [sales.increment_op(obj, d, units) for obj, d, units in sold], ordered=False
+                )
+            except BulkWriteError as exc:
+                failed = {err["index"] for err in exc.details.get("writeErrors", [])}
+                error = exc
+            except BaseException:
+                logger.error(
+                    "Writing buffered sales may have failed; not retried, "
+                    "check the buckets and rebuild the summaries: %s", sold,
+                )
+                raise
+            written = [op for i, op in enumerate(sold) if i not in failed]
+            if failed:
+                await self._requeue(docs, {}, [op for i, op in enumerate(sold) if i in failed])
+            await sales.write_summaries(
+                (obj, d, units, docs[obj].get("price", 0)) for obj, d, units in written
+            )
+            if error is not None:
+                raise error
+
+    async def _requeue(self, docs: Dict[ObjectId, dict], returns: Dict[ObjectId, int], sold: list):
+        for obj in set(returns) | {op[0] for op in sold}:
+            lease = self._leases.setdefault(obj, _Lease())
+            async with lease.lock:
+                lease.doc = lease.doc or docs[obj]
+                if _epoch(lease.doc) == _epoch(docs[obj]):
+                    lease.available += returns.get(obj, 0)
+                for op_obj, d, units in sold:
+                    if op_obj == obj:
+                        lease.pending[d] += units
+
+coalescer = SalesCoalescer(settings.sales_coalesce_window_ms, settings.sales_coalesce_lease)
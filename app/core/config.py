@@ -1,4 +1,5 @@
 # app/core/config.py
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -11,4 +12,44 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
+    # Mongo client (connection pool, timeouts, compression, read/write concerns)
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_connect_timeout_ms: int = 10000
+    mongo_server_selection_timeout_ms: int = 10000
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_compressors: str = ""  # e.g. "zstd,snappy,zlib"; zstd/snappy need their extras
+    mongo_read_preference: str = "primary"
+    mongo_write_concern: Optional[str] = None  # e.g. "majority" or "1"
+    mongo_journal: Optional[bool] = None
+    mongo_explain_on_startup: bool = True
+    mongo_slow_command_ms: float = 100
+
+    # password hashing (bcrypt runs in a worker pool, off the event loop)
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 32
+    password_hash_use_processes: bool = False
+
+    # cache of resolved principals (and verified tokens) used by get_current_user
+    principal_cache_size: int = 1024
+    principal_cache_ttl_seconds: float = 60
+    token_cache_enabled: bool = True
+    token_cache_size: int = 4096
+
+    # read-through cache of rendered inventory items and list pages
+    item_cache_size: int = 2048
+    item_cache_pages: int = 256
+    item_cache_ttl_seconds: float = 5
+
+    # opt-in write coalescing for sales/adjust (0 disables it)
+    sales_coalesce_window_ms: int = 0
+    sales_coalesce_lease: int = 20
+
+    # change-stream push of inventory deltas over /api/inventory/stream (needs a replica set)
+    inventory_stream_enabled: bool = True
+    inventory_stream_history: int = 1000  # max events replayed to a resuming client
+    inventory_stream_client_queue: int = 500  # pending deltas per client before it gets "reset"
+
 settings = Settings()
@@ -1,5 +1,122 @@
+# app/core/database.py
+import logging
+from typing import Optional
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
 from app.core.config import settings
 
-client = AsyncIOMotorClient(settings.mongo_uri)
-db = client[settings.db_name]
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+client: Optional[AsyncIOMotorClient] = None
+
+class _Database:
+    """
+    Forwards to the Motor database opened by connect(), so modules can keep
+    `from app.core.database import db` even though the client is created in
+    the app lifespan rather than at import time.
+    """
+    _target = None
+
+    def _get(self):
+        if self._target is None:
+            raise RuntimeError("Database is not connected; connect() runs in the app lifespan")
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __getitem__(self, name):
+        return self._get()[name]
+
+db = _Database()
+
+# Indexes declared per collection and created on startup.
+INDEXES = {
+    "users": [IndexModel([("email", ASCENDING)], name="email_unique", unique=True)],
+    "inventory": [
+        IndexModel([("name", ASCENDING)], name="name"),
+        IndexModel([("quantity", ASCENDING)], name="quantity"),
+    ],
+    "sales": [IndexModel([("item_id", ASCENDING), ("month", ASCENDING)], name="item_month")],
+}
+
+# Representative shapes of the hot queries, checked with explain on startup.
+HOT_QUERIES = [
+    ("users", {"email": "probe@example.com"}),
+    ("inventory", {"name": "probe"}),
+    ("inventory", {"_id": {"$gt": ObjectId()}}),
+    ("inventory", {"quantity": {"$lt": 5}}),
+    ("sales", {"item_id": ObjectId()}),
+]
+
+def _client_options() -> dict:
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "appname": "tea-shop-inventory",
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    if settings.mongo_write_concern:
+        w = settings.mongo_write_concern
+        options["w"] = int(w) if w.isdigit() else w
+    if settings.mongo_journal is not None:
+        options["journal"] = settings.mongo_journal
+    return options
+
+def connect(event_listeners=()):
+    global client
+    client = AsyncIOMotorClient(
+        settings.mongo_uri, event_listeners=list(event_listeners), **_client_options()
+    )
+    db._target = client[settings.db_name]
+
+def close():
+    global client
+    if client is not None:
+        client.close()
+    client = None
+    db._target = None
+
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as exc:
+            # e.g. duplicate emails blocking the unique index; keep serving.
+            logger.error("Could not create indexes on %s: %s", collection, exc)
+        except PyMongoError as exc:
+            # Server unreachable at boot: start anyway and fail per request;
+            # the indexes are created on the next start.
+            logger.error("Could not create indexes, skipping: %s", exc)
+            return
+
+def _has_collscan(plan) -> bool:
+    if isinstance(plan, dict):
+        return plan.get("stage") == "COLLSCAN" or any(_has_collscan(v) for v in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(v) for v in plan)
+    return False
+
+async def check_query_plans():
+    """Warn about hot queries whose winning plan is a collection scan."""
+    for collection, filter_q in HOT_QUERIES:
+        try:
+            explained = await db.command(
+                {"explain": {"find": collection, "filter": filter_q}, "verbosity": "queryPlanner"}
+            )
+        except OperationFailure as exc:
+            logger.warning("explain failed for %s %s: %s", collection, filter_q, exc)
+            continue
+        except PyMongoError as exc:
+            logger.warning("Skipping query plan checks: %s", exc)
+            return
+        if _has_collscan(explained.get("queryPlanner", {}).get("winningPlan")):
+            logger.warning("Hot query on %s falls back to COLLSCAN: %s", collection, filter_q)
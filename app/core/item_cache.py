@@ -0,0 +1,99 @@
+# app/core/item_cache.py
+"""
+Read-through cache of rendered inventory responses, with version-based ETags.
+
+Every write to an inventory document increments its `version` field, so
+"<id>-<version>" names one representation of an item across workers and
+restarts. Cached entries hold the serialized body and its ETag; a poll whose
+If-None-Match still matches is answered 304 without touching Mongo or
+re-serializing. Items are keyed by str(ObjectId), never by the id string a
+client sent. Routes that change or delete an item call invalidate_item(),
+which also drops the list pages containing it; creating an item calls
+invalidate_pages().
+
+A fill reads Mongo and then stores the result, so a write can land in between.
+Reads therefore take a fill token first; every invalidation moves the tokens on
+and a put holding a stale token is served to its caller but not stored.
+
+Other workers' copies are dropped by the change-stream watcher
+(app/core/changes.py) when it runs, and bounded by the TTL otherwise.
+"""
+import hashlib
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    headers: dict
+    item_ids: FrozenSet[str] = frozenset()
+
+def item_etag(item_id: str, version: int) -> str:
+    return f'"{item_id}-{version}"'
+
+def page_etag(key: tuple, versions: Iterable[tuple]) -> str:
+    digest = hashlib.sha1(repr((key, list(versions))).encode()).hexdigest()[:20]
+    return f'"p-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+class ItemCache:
+    def __init__(self, maxsize: int, pages: int, ttl: float):
+        self.items = TTLCache("inventory_items", maxsize, ttl)
+        self.pages = TTLCache("inventory_pages", pages, ttl)
+        # Invalidations per item id, reset (and _epoch bumped) once it outgrows the cache.
+        self._item_gens: Dict[str, int] = {}
+        self._epoch = 0
+        self._page_gen = 0
+
+    def item_token(self, item_id: str) -> tuple:
+        return self._epoch, self._item_gens.get(item_id, 0)
+
+    def page_token(self) -> int:
+        return self._page_gen
+
+    def get_item(self, item_id: str) -> Optional[CachedBody]:
+        return self.items.get(item_id)
+
+    def put_item(self, item_id: str, entry: CachedBody, token: tuple) -> CachedBody:
+        if token == self.item_token(item_id):
+            self.items.set(item_id, entry)
+        return entry
+
+    def get_page(self, key: tuple) -> Optional[CachedBody]:
+        return self.pages.get(key)
+
+    def put_page(self, key: tuple, entry: CachedBody, token: int) -> CachedBody:
+        if token == self._page_gen:
+            self.pages.set(key, entry)
+        return entry
+
+    def invalidate_item(self, item_id: str):
+        """The item's fields changed: drop it and every list page that contains it."""
+        self._item_gens[item_id] = self._item_gens.get(item_id, 0) + 1
+        if len(self._item_gens) > self.items.maxsize:
+            self._item_gens.clear()
+            self._epoch += 1
+        self.items.pop(item_id)
+        self._page_gen += 1
+        self.pages.discard_if(lambda entry: item_id in entry.item_ids)
+
+    def invalidate_pages(self):
+        """An item was added: page boundaries may have moved."""
+        self._page_gen += 1
+        self.pages.clear()
+
+    def clear(self):
+        self._item_gens.clear()
+        self._epoch += 1
+        self.items.clear()
+        self.invalidate_pages()
+
+item_cache = ItemCache(
+    settings.item_cache_size, settings.item_cache_pages, settings.item_cache_ttl_seconds
+)
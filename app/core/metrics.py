@@ -0,0 +1,133 @@
+# app/core/metrics.py
+"""
+Prometheus metrics: per-route HTTP counters and latency histograms, Mongo
+command timings (with a slow-command log), and the in-process cache counters.
+Exposed in text format by GET /metrics in main.py.
+
+Metrics are kept per process; with several uvicorn workers each one is
+scraped separately (or prometheus_client's multiprocess mode is configured).
+"""
+import logging
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+from app.core.cache import caches
+from app.core.hashing import hasher
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_ERRORS = Counter(
+    "http_request_errors_total", "HTTP requests that raised or answered 5xx", ["method", "route"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency", ["collection", "command"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_FAILURES = Counter(
+    "mongo_command_failures_total", "Mongo commands that failed", ["collection", "command"]
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight", "bcrypt calls queued or running in the hashing pool"
+)
+PASSWORD_HASH_IN_FLIGHT.set_function(lambda: hasher.in_flight)
+
+class MetricsMiddleware:
+    """ASGI middleware; labels requests by route template, not raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+            if status_code >= 500:
+                HTTP_ERRORS.labels(method, path).inc()
+
+class CommandTimer(monitoring.CommandListener):
+    """Times every Mongo command by collection and command name."""
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self._collections = {}
+
+    @staticmethod
+    def _collection(event) -> str:
+        command = event.command
+        if event.command_name == "getMore":
+            return command.get("collection", "")
+        target = command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        self._collections[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool = False):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1_000_000
+        MONGO_LATENCY.labels(collection, event.command_name).observe(seconds)
+        if failed:
+            MONGO_FAILURES.labels(collection, event.command_name).inc()
+        if seconds * 1000 >= self.slow_ms:
+            logger.warning(
+                "Slow Mongo command %s on %s took %.1f ms",
+                event.command_name, collection or "<db>", seconds * 1000,
+            )
+
+class CacheCollector:
+    """Reports the counters of every TTLCache registered in app.core.cache."""
+
+    def collect(self):
+        size = GaugeMetricFamily("cache_entries", "Entries held", labels=["cache"])
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "LRU evictions", labels=["cache"])
+        for name, cache in caches.items():
+            stats = cache.stats()
+            size.add_metric([name], stats["size"])
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+        yield from (size, hits, misses, evictions)
+
+REGISTRY.register(CacheCollector())
+
+def render() -> tuple:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,183 @@
+# app/core/sales.py
+"""
+Sales history storage.
+
+Sales live in db.sales as one bucket document per item per month, so the
+inventory document stays small and fixed-size:
+
+    {"_id": "<item_id>:<YYYY-MM>", "item_id": ObjectId, "month": "YYYY-MM",
+     "days": {"DD": count, ...}, "total": <sum of days>}
+
+The _id is deterministic, so a bucket is always addressed (and upserted) by
+primary key, and a date range for one item is a contiguous _id range.
+
+Every write also maintains report summaries in db.sales_summary, one document
+per day ("d:YYYY-MM-DD") and per month ("m:YYYY-MM"):
+
+    {"_id": "d:2026-10-16", "units": n, "revenue": price * units summed,
+     "items": {"<item_id>": units, ...}}
+
+so reports read a handful of summary documents instead of every bucket.
+Revenue is booked at the item's price when the sale is written.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from app.core.database import db
+
+# Pipeline stage recomputing the running monthly total from the day counts.
+_TOTAL_STAGE = {
+    "$set": {
+        "total": {"$sum": {"$map": {"input": {"$objectToArray": "$days"}, "in": "$$this.v"}}}
+    }
+}
+
+def normalize_date(value: str) -> str:
+    """Canonical 'YYYY-MM-DD' form of a date string. Raises ValueError if malformed."""
+    return date.fromisoformat(value).isoformat()
+
+def split_date(value: str) -> tuple:
+    """'YYYY-MM-DD' -> ('YYYY-MM', 'DD'). Raises ValueError on a malformed date."""
+    month, day = normalize_date(value).rsplit("-", 1)
+    return month, day
+
+def bucket_id(item_id: ObjectId, month: str) -> str:
+    return f"{item_id}:{month}"
+
+def _increment(item_id: ObjectId, value: str, change: int) -> tuple:
+    month, day = split_date(value)
+    filter_q = {"_id": bucket_id(item_id, month)}
+    update_q = {
+        "$inc": {f"days.{day}": change, "total": change},
+        "$setOnInsert": {"item_id": item_id, "month": month},
+    }
+    return filter_q, update_q
+
+def increment_op(item_id: ObjectId, value: str, change: int) -> UpdateOne:
+    return UpdateOne(*_increment(item_id, value, change), upsert=True)
+
+def summary_ops(entries) -> list:
+    """
+    Summary updates for (item_id, date, units, price) entries, combined into a
+    single $inc per summary document.
+    """
+    incs = defaultdict(lambda: defaultdict(int))
+    for item_id, value, units, price in entries:
+        if not units:
+            continue
+        day = normalize_date(value)
+        for key in (f"d:{day}", f"m:{day[:7]}"):
+            inc = incs[key]
+            inc["units"] += units
+            inc["revenue"] += units * price
+            inc[f"items.{item_id}"] += units
+    return [UpdateOne({"_id": key}, {"$inc": dict(inc)}, upsert=True) for key, inc in incs.items()]
+
+async def write_summaries(entries):
+    ops = summary_ops(entries)
+    if ops:
+        await db.sales_summary.bulk_write(ops, ordered=False)
+
+async def increment(item_id: ObjectId, value: str, change: int, price: float):
+    await asyncio.gather(
+        db.sales.update_one(*_increment(item_id, value, change), upsert=True),
+        write_summaries([(item_id, value, change, price)]),
+    )
+
+async def set_count(item_id: ObjectId, value: str, count: int, price: float):
+    month, day = split_date(value)
+    previous = await db.sales.find_one_and_update(
+        {"_id": bucket_id(item_id, month)},
+        [
+            {"$set": {"item_id": item_id, "month": month, f"days.{day}": count}},
+            _TOTAL_STAGE,
+        ],
+        projection={f"days.{day}": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    before = (previous or {}).get("days", {}).get(day, 0)
+    await write_summaries([(item_id, value, count - before, price)])
+
+async def get_count(item_id: ObjectId, value: str) -> int:
+    month, day = split_date(value)
+    bucket = await db.sales.find_one({"_id": bucket_id(item_id, month)}, {f"days.{day}": 1})
+    if not bucket:
+        return 0
+    return bucket.get("days", {}).get(day, 0)
+
+async def delete_count(item_id: ObjectId, value: str, price: float) -> bool:
+    """Remove one day's entry. Returns False when there was nothing to remove."""
+    month, day = split_date(value)
+    previous = await db.sales.find_one_and_update(
+        {"_id": bucket_id(item_id, month), f"days.{day}": {"$exists": True}},
+        [{"$unset": f"days.{day}"}, _TOTAL_STAGE],
+        projection={f"days.{day}": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None:
+        return False
+    await write_summaries([(item_id, value, -previous["days"][day], price)])
+    return True
+
+def summary_ids(date_from: str, date_to: str) -> list:
+    """
+    Summary _ids covering date_from..date_to: whole months where the range
+    spans them, single days at the edges.
+    """
+    ids = []
+    day, last = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    while day <= last:
+        next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if day.day == 1 and next_month - timedelta(days=1) <= last:
+            ids.append(f"m:{day:%Y-%m}")
+            day = next_month
+        else:
+            ids.append(f"d:{day.isoformat()}")
+            day += timedelta(days=1)
+    return ids
+
+async def delete_item(item_id: ObjectId):
+    await db.sales.delete_many({"item_id": item_id})
+
+async def sales_range(item_id: ObjectId, date_from: str, date_to: str) -> dict:
+    """Daily counts and per-month totals for date_from..date_to (inclusive)."""
+    date_from, date_to = normalize_date(date_from), normalize_date(date_to)
+    month_from, _ = split_date(date_from)
+    month_to, _ = split_date(date_to)
+    pipeline = [
+        {"$match": {"_id": {
+            "$gte": bucket_id(item_id, month_from),
+            "$lte": bucket_id(item_id, month_to),
+        }}},
+        {"$project": {"month": 1, "days": {"$objectToArray": "$days"}}},
+        {"$unwind": "$days"},
+        {"$project": {
+            "_id": 0,
+            "month": 1,
+            "date": {"$concat": ["$month", "-", "$days.k"]},
+            "count": "$days.v",
+        }},
+        {"$match": {"date": {"$gte": date_from, "$lte": date_to}}},
+        {"$sort": {"date": 1}},
+        {"$facet": {
+            "days": [{"$project": {"date": 1, "count": 1}}],
+            "months": [
+                {"$group": {"_id": "$month", "total": {"$sum": "$count"}}},
+                {"$sort": {"_id": 1}},
+                {"$project": {"_id": 0, "month": "$_id", "total": 1}},
+            ],
+        }},
+    ]
+    result = await db.sales.aggregate(pipeline).to_list(length=1)
+    days = result[0]["days"] if result else []
+    months = result[0]["months"] if result else []
+    return {
+        "from": date_from,
+        "to": date_to,
+        "total": sum(m["total"] for m in months),
+        "days": days,
+        "months": months,
+    }
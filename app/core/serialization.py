@@ -0,0 +1,31 @@
+# app/core/serialization.py
+"""
+Lean response serialization.
+
+Inventory documents are written only through validated models, so reads can
+be turned into response bodies directly instead of building InventoryItemDB
+objects and having FastAPI validate them again through response_model.
+Handlers return ORJSONResponse(item_to_dict(doc)); response_model stays on
+the routes for the OpenAPI schema.
+"""
+import orjson
+from bson import ObjectId
+from app.models.inventory import InventoryItemCreate
+
+ITEM_FIELDS = tuple(InventoryItemCreate.model_fields)
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    """orjson with ObjectId support; dates and datetimes are handled natively."""
+    return orjson.dumps(content, default=_default)
+
+def item_to_dict(doc: dict) -> dict:
+    """Inventory document -> InventoryItemDB-shaped dict. Fields absent from a
+    projected document are left out."""
+    out = {field: doc[field] for field in ITEM_FIELDS if field in doc}
+    out["id"] = str(doc["_id"])
+    return out
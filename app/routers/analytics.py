@@ -0,0 +1,100 @@
+# app/routers/analytics.py
+from fastapi import APIRouter, HTTPException, Query
+from app.core.database import db
+from app.core import sales
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+def _date_range(date_from: str, date_to: str) -> tuple:
+    try:
+        date_from, date_to = sales.normalize_date(date_from), sales.normalize_date(date_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return date_from, date_to
+
+@router.get("/top-sellers")
+async def top_sellers(
+    date_from: str = Query(..., alias="from"),
+    date_to: str = Query(..., alias="to"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Items with the most units sold between ?from= and ?to= (inclusive)."""
+    date_from, date_to = _date_range(date_from, date_to)
+    pipeline = [
+        {"$match": {"_id": {"$in": sales.summary_ids(date_from, date_to)}}},
+        {"$project": {"items": {"$objectToArray": "$items"}}},
+        {"$unwind": "$items"},
+        {"$group": {"_id": "$items.k", "units": {"$sum": "$items.v"}}},
+        {"$match": {"units": {"$gt": 0}}},
+        {"$sort": {"units": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": "inventory",
+            "let": {"item": {"$toObjectId": "$_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$item"]}}},
+                {"$project": {"name": 1}},
+            ],
+            "as": "item",
+        }},
+        {"$project": {
+            "_id": 0,
+            "item_id": "$_id",
+            "name": {"$first": "$item.name"},  # missing for deleted items
+            "units": 1,
+        }},
+    ]
+    items = await db.sales_summary.aggregate(pipeline).to_list(length=limit)
+    return {"from": date_from, "to": date_to, "items": items}
+
+@router.get("/low-stock")
+async def low_stock(
+    threshold: int = Query(5, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Items whose quantity is below ?threshold=, lowest first."""
+    pipeline = [
+        {"$match": {"quantity": {"$lt": threshold}}},
+        {"$sort": {"quantity": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": 1, "quantity": 1}},
+    ]
+    items = await db.inventory.aggregate(pipeline).to_list(length=limit)
+    return {"threshold": threshold, "items": items}
+
+@router.get("/revenue")
+async def revenue(
+    date_from: str = Query(..., alias="from"),
+    date_to: str = Query(..., alias="to"),
+    granularity: str = Query("day", pattern="^(day|month)$"),
+):
+    """
+    Units and revenue (price x count) per day or per month. Monthly figures
+    cover whole calendar months, including the edges of the range.
+    """
+    date_from, date_to = _date_range(date_from, date_to)
+    if granularity == "day":
+        low, high = f"d:{date_from}", f"d:{date_to}"
+    else:
+        low, high = f"m:{date_from[:7]}", f"m:{date_to[:7]}"
+    pipeline = [
+        {"$match": {"_id": {"$gte": low, "$lte": high}}},
+        {"$sort": {"_id": 1}},
+        {"$project": {
+            "_id": 0,
+            "period": {"$substrCP": ["$_id", 2, 10]},
+            "units": 1,
+            "revenue": {"$round": ["$revenue", 2]},
+        }},
+    ]
+    periods = await db.sales_summary.aggregate(pipeline).to_list(length=None)
+    return {
+        "from": date_from,
+        "to": date_to,
+        "granularity": granularity,
+        "units": sum(p["units"] for p in periods),
+        "revenue": round(sum(p["revenue"] for p in periods), 2),
+        "periods": periods,
+    }
@@ -1,24 +1,16 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
 from bson import ObjectId
 from app.core.database import db
 from app.models.user import UserCreate, UserLogin, UserInDB, Token
 from app.core.config import settings
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, invalidate_user
+from app.core.hashing import hasher
 
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
@@ -31,7 +23,7 @@ async def signup(user: UserCreate):
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed = hash_password(user.password)
+    hashed = await hasher.hash(user.password)
     user_dict = user.dict()
     user_dict["password"] = hashed
 
@@ -42,9 +34,16 @@ async def signup(user: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(user: UserLogin):
     db_user = await db.users.find_one({"email": user.email})
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    
+    valid, new_hash = await hasher.verify_and_update(user.password, db_user["password"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Stored hash predates the current bcrypt cost; upgrade it transparently.
+        await db.users.update_one({"_id": db_user["_id"]}, {"$set": {"password": new_hash}})
+        invalidate_user(db_user["email"])
+
     token_data = {"sub": db_user["email"]}
     access_token = create_access_token(
         data=token_data,
@@ -1,10 +1,20 @@
 # app/routers/inventory.py
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from collections import defaultdict
+from fastapi import APIRouter, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
 from app.models.inventory import InventoryItemCreate, InventoryItemDB
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.core.database import db
+from app.core import sales
+from app.core.changes import watcher
+from app.core.coalescer import coalescer
+from app.core.item_cache import CachedBody, etag_matches, item_cache, item_etag, page_etag
+from app.core.serialization import dumps, item_to_dict
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
@@ -24,34 +34,167 @@ class SalesAdjust(BaseModel):
 class SetQuantityBody(BaseModel):
     quantity: int
 
+class SalesAdjustEntry(BaseModel):
+    item_id: str
+    date: str   # 'YYYY-MM-DD'
+    change: int
+
+class SalesAdjustBatch(BaseModel):
+    entries: List[SalesAdjustEntry] = Field(..., min_length=1, max_length=1000)
+    ordered: bool = False
+
+class SalesAdjustResult(BaseModel):
+    index: int
+    item_id: str
+    ok: bool
+    quantity: Optional[int] = None
+    error: Optional[str] = None
+
+class SalesAdjustBatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[SalesAdjustResult]
+
+# ---- Listing helpers ----
+# Fields a client may ask for through ?fields=. Anything else on the document
+# (e.g. a legacy `sales` map awaiting migration) is never loaded for lists.
+LISTABLE_FIELDS = ("name", "quantity", "price", "description")
+STREAM_BATCH_SIZE = 200
+
+def _list_projection(fields: Optional[str]) -> dict:
+    if not fields:
+        return {name: 1 for name in LISTABLE_FIELDS}
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LISTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {name: 1 for name in requested}
+
+def _render_item(doc: dict) -> CachedBody:
+    item = item_to_dict(doc)
+    return CachedBody(dumps(item), item_etag(item["id"], doc.get("version", 0)), {})
+
+def _cached_response(entry: CachedBody, if_none_match: Optional[str]) -> Response:
+    headers = {**entry.headers, "ETag": entry.etag}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
 # ---- CRUD ----
 @router.get("/", response_model=List[InventoryItemDB])
-async def list_items():
-    items = []
-    async for doc in db.inventory.find():
-        doc["id"] = str(doc["_id"])
-        items.append(InventoryItemDB(**doc))
-    return items
+async def list_items(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Keyset-paginated listing ordered by _id.
+    ?after=<id of the last item seen> continues from the previous page; the
+    cursor for the next page is returned in the X-Next-Cursor header.
+    ?fields=name,quantity returns only those fields (plus id).
+    ?stream=true sends the whole collection as NDJSON while the cursor yields it,
+    ignoring `limit`.
+    Pages are cached and carry an ETag; If-None-Match answers 304 when unchanged.
+    """
+    projection = _list_projection(fields)
+    filter_q = {}
+    if after:
+        try:
+            filter_q["_id"] = {"$gt": ObjectId(after)}
+        except:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if stream:
+        cursor = db.inventory.find(filter_q, projection).sort("_id", 1).batch_size(STREAM_BATCH_SIZE)
+
+        async def ndjson():
+            async for doc in cursor:
+                yield dumps(item_to_dict(doc)) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    key = (str(filter_q["_id"]["$gt"]) if after else None, limit, fields)
+    entry = item_cache.get_page(key)
+    if entry is None:
+        token = item_cache.page_token()
+        cursor = db.inventory.find(filter_q, {**projection, "version": 1}).sort("_id", 1).limit(limit)
+        items, versions = [], []
+        async for doc in cursor:
+            item = item_to_dict(doc)
+            items.append(item)
+            versions.append((item["id"], doc.get("version", 0)))
+        headers = {}
+        if len(items) == limit:
+            headers["X-Next-Cursor"] = items[-1]["id"]
+        body = dumps(items)
+        entry = item_cache.put_page(
+            key,
+            CachedBody(body, page_etag(key, versions), headers, frozenset(i for i, _ in versions)),
+            token,
+        )
+    return _cached_response(entry, if_none_match)
+
+@router.websocket("/stream")
+async def inventory_stream(websocket: WebSocket, items: Optional[str] = None, resume_after: Optional[str] = None):
+    """
+    Live quantity and sales deltas (see app/core/changes.py for the messages).
+    ?items=id1,id2 limits the feed to those items.
+    ?resume_after=<token of the last message seen> replays what was missed.
+    """
+    await websocket.accept()
+    if not watcher.running:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Inventory stream unavailable")
+        return
+    item_ids = {i.strip() for i in items.split(",") if i.strip()} if items else None
+    subscriber = await watcher.subscribe(item_ids, resume_after)
+
+    async def send():
+        while True:
+            for delta in await subscriber.next_batch():
+                await websocket.send_text(dumps(delta).decode())
+
+    async def receive():
+        # Clients only listen; reading is how a disconnect is noticed while idle.
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.unsubscribe(subscriber)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 @router.post("/", response_model=InventoryItemDB, status_code=status.HTTP_201_CREATED)
 async def create_item(item: InventoryItemCreate):
     # When creating, the frontend may send initial quantity but you can store as-is.
-    res = await db.inventory.insert_one(item.dict())
+    res = await db.inventory.insert_one({**item.dict(), "version": 1})
+    item_cache.invalidate_pages()
     created = await db.inventory.find_one({"_id": res.inserted_id})
-    created["id"] = str(created["_id"])
-    return InventoryItemDB(**created)
+    return ORJSONResponse(item_to_dict(created), status_code=status.HTTP_201_CREATED)
 
 @router.get("/{item_id}", response_model=InventoryItemDB)
-async def get_item(item_id: str):
+async def get_item(item_id: str, if_none_match: Optional[str] = Header(None)):
     try:
         obj = ObjectId(item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
-    doc = await db.inventory.find_one({"_id": obj})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Item not found")
-    doc["id"] = str(doc["_id"])
-    return InventoryItemDB(**doc)
+    key = str(obj)  # ObjectId also accepts uppercase hex; cache under one spelling
+    entry = item_cache.get_item(key)
+    if entry is None:
+        token = item_cache.item_token(key)
+        doc = await db.inventory.find_one({"_id": obj}, {"sales": 0})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Item not found")
+        entry = item_cache.put_item(key, _render_item(doc), token)
+    return _cached_response(entry, if_none_match)
 
 @router.put("/{item_id}", response_model=InventoryItemDB)
 async def update_item(item_id: str, item: InventoryItemCreate):
@@ -60,12 +203,17 @@ async def update_item(item_id: str, item: InventoryItemCreate):
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
 
-    res = await db.inventory.update_one({"_id": obj}, {"$set": item.dict()})
+    # Flush this worker's lease first; the stock_epoch bump voids unsold stock
+    # leased before the override, here or on any other worker.
+    await coalescer.release(obj)
+    res = await db.inventory.update_one(
+        {"_id": obj}, {"$set": item.dict(), "$inc": {"version": 1, "stock_epoch": 1}}
+    )
     if not res.matched_count:
         raise HTTPException(status_code=404, detail="Item not found")
+    item_cache.invalidate_item(str(obj))
     updated = await db.inventory.find_one({"_id": obj})
-    updated["id"] = str(updated["_id"])
-    return InventoryItemDB(**updated)
+    return ORJSONResponse(item_to_dict(updated))
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(item_id: str):
@@ -73,9 +221,12 @@ async def delete_item(item_id: str):
         obj = ObjectId(item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
+    await coalescer.release(obj)
     res = await db.inventory.delete_one({"_id": obj})
     if not res.deleted_count:
         raise HTTPException(status_code=404, detail="Item not found")
+    item_cache.invalidate_item(str(obj))
+    await sales.delete_item(obj)
 
 # ---- Adjust quantity endpoint (kept for compatibility; not required if you use sales.adjust) ----
 @router.patch("/{item_id}/quantity", response_model=InventoryItemDB)
@@ -84,12 +235,12 @@ async def adjust_quantity(item_id: str, payload: QuantityChange):
         obj = ObjectId(item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
-    res = await db.inventory.update_one({"_id": obj}, {"$inc": {"quantity": payload.change}})
+    res = await db.inventory.update_one({"_id": obj}, {"$inc": {"quantity": payload.change, "version": 1}})
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
+    item_cache.invalidate_item(str(obj))
     updated = await db.inventory.find_one({"_id": obj})
-    updated["id"] = str(updated["_id"])
-    return InventoryItemDB(**updated)
+    return ORJSONResponse(item_to_dict(updated))
 
 # ---- NEW: adjust sales for a specific date and update remaining quantity atomically ----
 @router.patch("/{item_id}/sales/adjust", response_model=InventoryItemDB)
@@ -104,30 +255,243 @@ async def adjust_sales(item_id: str, payload: SalesAdjust):
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
 
+    try:
+        sales_date = sales.normalize_date(payload.date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+
     change = int(payload.change)
-    date_field = f"sales.{payload.date}"
+    if change > 0 and coalescer.enabled:
+        # Sold from this worker's reserved stock; the counts are flushed later.
+        updated = await coalescer.sell(obj, sales_date, change)
+        if updated is None:
+            raise HTTPException(status_code=400, detail="Item not found or insufficient stock")
+        return ORJSONResponse(item_to_dict(updated))
 
     if change > 0:
         # Only allow sale if enough stock exists
         filter_q = {"_id": obj, "quantity": {"$gte": change}}
-        update_q = {"$inc": {date_field: change, "quantity": -change}}
     else:
         # Undoing sales: allow, and increase stock
         filter_q = {"_id": obj}
-        update_q = {"$inc": {date_field: change, "quantity": -change}}
 
-    res = await db.inventory.update_one(filter_q, update_q)
-    if res.matched_count == 0:
+    updated = await db.inventory.find_one_and_update(
+        filter_q,
+        {"$inc": {"quantity": -change, "version": 1}},
+        projection={"sales": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated is None:
         raise HTTPException(status_code=400, detail="Item not found or insufficient stock")
+    item_cache.invalidate_item(str(obj))
+    # Stock is reserved first so a failed guard never records a sale.
+    await sales.increment(obj, sales_date, change, updated["price"])
+    return ORJSONResponse(item_to_dict(updated))
 
-    updated = await db.inventory.find_one({"_id": obj})
-    if updated is None:
-        raise HTTPException(status_code=404, detail="Item not found after update")
-    updated["id"] = str(updated["_id"])
-    # ensure sales exists
-    if "sales" not in updated:
-        updated["sales"] = {}
-    return InventoryItemDB(**updated)
+def _apply_changes(quantity: int, changes: List[int], ordered: bool) -> tuple:
+    """
+    Apply sales changes in order with the stock guard, exactly as
+    _changes_pipeline() does in Mongo: a sale (change > 0) only goes through
+    while quantity >= change. With `ordered` nothing after the first rejected
+    change is applied. Returns ([applied, ...], final quantity).
+    """
+    applied, stopped = [], False
+    for change in changes:
+        ok = not stopped and (change <= 0 or quantity >= change)
+        if ok:
+            quantity -= change
+        elif ordered:
+            stopped = True
+        applied.append(ok)
+    return applied, quantity
+
+def _changes_pipeline(changes: List[int], ordered: bool) -> list:
+    step = {"$cond": [
+        {"$and": [
+            {"$not": ["$$value.stopped"]},
+            {"$or": [{"$lte": ["$$this", 0]}, {"$gte": ["$$value.q", "$$this"]}]},
+        ]},
+        {"q": {"$subtract": ["$$value.q", "$$this"]}, "stopped": False},
+        {"q": "$$value.q", "stopped": ordered},
+    ]}
+    applied = {"$reduce": {
+        "input": changes, "initialValue": {"q": "$quantity", "stopped": False}, "in": step,
+    }}
+    return [{"$set": {
+        "quantity": {"$let": {"vars": {"r": applied}, "in": "$$r.q"}},
+        "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+    }}]
+
+async def _adjust_items(entries, indices, obj_ids, results, quantities, prices, ordered) -> List[int]:
+    """
+    One guarded write per item for the entries at `indices`, all concurrent.
+    Fills in `results` and the items' new quantities and prices; returns the
+    indices of the entries that failed.
+    """
+    by_item = defaultdict(list)
+    for i in indices:
+        by_item[obj_ids[i]].append(i)
+    objs = list(by_item)
+    befores = await asyncio.gather(*(
+        db.inventory.find_one_and_update(
+            {"_id": obj},
+            _changes_pipeline([entries[i].change for i in by_item[obj]], ordered),
+            projection={"quantity": 1, "price": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        for obj in objs
+    ), return_exceptions=True)
+
+    failed = []
+    for obj, before in zip(objs, befores):
+        item_indices = by_item[obj]
+        if isinstance(before, BaseException):
+            if not isinstance(before, PyMongoError):
+                raise before
+            for i in item_indices:
+                results[i].error = "Write failed; outcome unknown"
+            failed += item_indices
+            continue
+        if before is None:
+            for i in item_indices:
+                results[i].error = "Item not found"
+            failed += item_indices
+            continue
+        applied, quantities[obj] = _apply_changes(
+            before.get("quantity", 0), [entries[i].change for i in item_indices], ordered
+        )
+        prices[obj] = before.get("price", 0)
+        for i, ok in zip(item_indices, applied):
+            results[i].ok = ok
+            if not ok:
+                results[i].error = "Insufficient stock"
+                failed.append(i)
+    return failed
+
+async def _adjust_ordered(entries, indices, obj_ids, results, quantities, prices):
+    """
+    Predict from the current stock where an ordered batch stops, send the
+    entries up to there, and repeat if it got further than predicted. When a
+    concurrent write made it stop earlier, whatever was applied past the stop
+    is reversed.
+    """
+    start = 0
+    while start < len(indices):
+        pending = indices[start:]
+        stock = {}
+        cursor = db.inventory.find({"_id": {"$in": list({obj_ids[i] for i in pending})}}, {"quantity": 1})
+        async for doc in cursor:
+            stock[doc["_id"]] = doc.get("quantity", 0)
+        stop = len(pending) - 1
+        for n, i in enumerate(pending):
+            obj, change = obj_ids[i], entries[i].change
+            if obj not in stock or (change > 0 and stock[obj] < change):
+                stop = n
+                break
+            stock[obj] -= change
+
+        chunk = pending[:stop + 1]
+        failed = await _adjust_items(entries, chunk, obj_ids, results, quantities, prices, ordered=True)
+        if failed:
+            first = min(failed)
+            await _reverse_applied(entries, [i for i in chunk if i > first], obj_ids, results, quantities)
+            for i in chunk:
+                if i > first and not results[i].ok:
+                    results[i].error = "Not attempted"
+            return
+        start += stop + 1
+
+async def _reverse_applied(entries, indices, obj_ids, results, quantities):
+    by_item = defaultdict(list)
+    for i in indices:
+        if results[i].ok:
+            by_item[obj_ids[i]].append(i)
+    objs = list(by_item)
+    amounts = [sum(entries[i].change for i in by_item[obj]) for obj in objs]
+    docs = await asyncio.gather(*(
+        db.inventory.find_one_and_update(
+            # Taking back restocked units must not drive the quantity negative.
+            {"_id": obj, "quantity": {"$gte": -amount}} if amount < 0 else {"_id": obj},
+            {"$inc": {"quantity": amount, "version": 1}},
+            projection={"quantity": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        for obj, amount in zip(objs, amounts)
+    ), return_exceptions=True)
+    for obj, doc in zip(objs, docs):
+        if isinstance(doc, BaseException) and not isinstance(doc, PyMongoError):
+            raise doc
+        if isinstance(doc, dict):
+            quantities[obj] = doc.get("quantity", 0)
+            for i in by_item[obj]:
+                results[i].ok = False
+        # Otherwise the entries stay applied and are reported as such.
+
+# ---- Batch variant of sales/adjust: one guarded write per item, all concurrent ----
+@router.post("/sales/adjust/batch", response_model=SalesAdjustBatchResult)
+async def adjust_sales_batch(payload: SalesAdjustBatch):
+    """
+    Body: {"entries": [{"item_id": "...", "date": "YYYY-MM-DD", "change": 1}, ...],
+           "ordered": false}
+    Applies every entry with the same stock guard as /{item_id}/sales/adjust.
+    With ordered=true processing stops at the first failure and the remaining
+    entries are reported as not attempted.
+
+    Each item's entries are sent as one find_one_and_update whose pipeline
+    applies them in order, guard included; the writes for all items run
+    concurrently. Replaying the same steps on the document as it was before
+    the write tells exactly which entries went through and the quantity they
+    left. Ordered batches first read the stock to predict where they stop.
+    """
+    entries = payload.entries
+    results = [SalesAdjustResult(index=i, item_id=e.item_id, ok=False) for i, e in enumerate(entries)]
+    obj_ids, dates, valid = {}, {}, []
+    for i, e in enumerate(entries):
+        try:
+            obj_ids[i] = ObjectId(e.item_id)
+        except:
+            results[i].error = "Invalid item id"
+        else:
+            try:
+                dates[i] = sales.normalize_date(e.date)
+                valid.append(i)
+                continue
+            except ValueError:
+                results[i].error = "Invalid date"
+        if payload.ordered:
+            break
+
+    quantities, prices = {}, {}
+    if payload.ordered:
+        await _adjust_ordered(entries, valid, obj_ids, results, quantities, prices)
+    else:
+        await _adjust_items(entries, valid, obj_ids, results, quantities, prices, ordered=False)
+    for r in results:
+        if r.index in obj_ids:
+            r.quantity = quantities.get(obj_ids[r.index])
+        if payload.ordered and not r.ok and r.error is None:
+            r.error = "Not attempted"
+
+    for obj in quantities:
+        item_cache.invalidate_item(str(obj))
+
+    # Record the accepted sales in their buckets and the summaries.
+    accepted = [
+        (obj_ids[r.index], dates[r.index], entries[r.index].change, prices[obj_ids[r.index]])
+        for r in results if r.ok
+    ]
+    if accepted:
+        await asyncio.gather(
+            db.sales.bulk_write(
+                [sales.increment_op(obj, d, change) for obj, d, change, _ in accepted], ordered=False
+            ),
+            sales.write_summaries(accepted),
+        )
+
+    succeeded = sum(1 for r in results if r.ok)
+    return SalesAdjustBatchResult(
+        succeeded=succeeded, failed=len(results) - succeeded, results=results
+    )
 
 # ---- Set quantity explicitly (manual override) ----
 @router.patch("/{item_id}/set_quantity", response_model=InventoryItemDB)
@@ -138,12 +502,16 @@ async def set_quantity(item_id: str, payload: SetQuantityBody):
         raise HTTPException(status_code=400, detail="Invalid item id")
     if payload.quantity < 0:
         raise HTTPException(status_code=400, detail="Quantity cannot be negative")
-    res = await db.inventory.update_one({"_id": obj}, {"$set": {"quantity": payload.quantity}})
+    await coalescer.release(obj)
+    res = await db.inventory.update_one(
+        {"_id": obj},
+        {"$set": {"quantity": payload.quantity}, "$inc": {"version": 1, "stock_epoch": 1}},
+    )
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
+    item_cache.invalidate_item(str(obj))
     updated = await db.inventory.find_one({"_id": obj})
-    updated["id"] = str(updated["_id"])
-    return InventoryItemDB(**updated)
+    return ORJSONResponse(item_to_dict(updated))
 
 # ---- Sales endpoints ----
 @router.post("/sales/update")
@@ -151,28 +519,70 @@ async def update_sales(data: SalesUpdateBody):
     """
     Keep for backward compatibility if desired. Body:
     {"item_id":"...", "date":"YYYY-MM-DD", "count": 5}
-    This sets sales.<date> = count (overwrites).
+    This sets the count for <date> in the item's sales bucket (overwrites).
     """
     try:
         obj = ObjectId(data.item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
 
-    res = await db.inventory.update_one({"_id": obj}, {"$set": {f"sales.{data.date}": data.count}})
-    if res.matched_count == 0:
+    try:
+        sales_date = sales.normalize_date(data.date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+
+    item = await db.inventory.find_one({"_id": obj}, {"price": 1})
+    if not item:
         raise HTTPException(status_code=404, detail="Item not found")
+    await coalescer.release(obj)
+    await sales.set_count(obj, sales_date, data.count, item.get("price", 0))
     return {"message": "Sales updated", "date": data.date, "count": data.count}
 
+@router.get("/{item_id}/sales")
+async def get_sales_range(
+    item_id: str,
+    date_from: str = Query(..., alias="from"),
+    date_to: str = Query(..., alias="to"),
+):
+    """
+    Daily counts and monthly totals for ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive),
+    aggregated from the item's monthly sales buckets.
+    """
+    try:
+        obj = ObjectId(item_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid item id")
+    try:
+        date_from, date_to = sales.normalize_date(date_from), sales.normalize_date(date_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    item, summary = await asyncio.gather(
+        db.inventory.find_one({"_id": obj}, {"_id": 1}),
+        sales.sales_range(obj, date_from, date_to),
+    )
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"item_id": item_id, **summary}
+
 @router.get("/{item_id}/sales/{date}")
 async def get_sales(item_id: str, date: str):
     try:
         obj = ObjectId(item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
-    item = await db.inventory.find_one({"_id": obj})
+    try:
+        sales_date = sales.normalize_date(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    item, count = await asyncio.gather(
+        db.inventory.find_one({"_id": obj}, {"_id": 1}),
+        sales.get_count(obj, sales_date),
+    )
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    count = item.get("sales", {}).get(date, 0)
     return {"date": date, "count": count}
 
 @router.delete("/{item_id}/sales/{date}")
@@ -181,7 +591,12 @@ async def delete_sales(item_id: str, date: str):
         obj = ObjectId(item_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid item id")
-    res = await db.inventory.update_one({"_id": obj}, {"$unset": {f"sales.{date}": ""}})
-    if res.modified_count == 0:
+    try:
+        sales_date = sales.normalize_date(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    await coalescer.release(obj)
+    item = await db.inventory.find_one({"_id": obj}, {"price": 1})
+    if not await sales.delete_count(obj, sales_date, (item or {}).get("price", 0)):
         raise HTTPException(status_code=404, detail="Sales entry not found")
     return {"message": "Sales entry deleted", "date": date}
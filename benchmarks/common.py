@@ -0,0 +1,23 @@
+# benchmarks/common.py
+"""Helpers shared by the benchmark scripts."""
+import os
+
+# Settings() requires these; benchmarks fill in throwaway values unless set.
+BENCH_ENV = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DB_NAME": "bench",
+    "SECRET_KEY": "bench",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+def apply_env(overrides: dict = None):
+    """Populate the environment; must run before anything imports app.core.config."""
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    for key, value in (overrides or {}).items():
+        os.environ[key] = value
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,252 @@
+# benchmarks/harness.py
+"""
+Load benchmark for the API, driven in-process.
+
+Requests go through httpx's ASGI transport straight into `main.app`, which
+runs its normal lifespan against a throwaway local mongod (or --mongo-uri).
+The database is seeded with --items items and --days days of sales each,
+then a weighted mix of list / get / sales-adjust / login requests runs at
+--concurrency. Per-endpoint throughput and p50/p95/p99 latency are printed
+and written to --output as JSON. With --baseline, the run fails (exit 1) when
+any endpoint's p95 or throughput regresses by more than --max-regression.
+
+    python -m benchmarks.harness --items 2000 --days 365 --requests 5000 \\
+        --concurrency 32 --mix list=4,get=4,adjust=2,login=1 --output run.json
+    python -m benchmarks.harness ... --baseline run.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from benchmarks.common import apply_env, percentile
+from benchmarks.mongod import local_mongod
+
+PASSWORD = "bench-password"
+USERS = 20
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(WORKLOADS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown workloads: {', '.join(sorted(unknown))}")
+    return mix
+
+async def seed(db, items: int, days: int, rng: random.Random) -> list:
+    from app.core.hashing import hasher
+    from app.core.sales import bucket_id
+
+    await db.inventory.delete_many({})
+    await db.sales.delete_many({})
+    await db.users.delete_many({})
+
+    docs = [
+        {
+            "name": f"item-{n:06d}",
+            "quantity": 10**9,  # never the limiting factor for sales/adjust
+            "price": round(rng.uniform(1, 20), 2),
+            "description": "benchmark item",
+            "version": 1,
+        }
+        for n in range(items)
+    ]
+    ids = (await db.inventory.insert_many(docs)).inserted_ids
+
+    today = date.today()
+    for item_id in ids:
+        buckets = defaultdict(dict)
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            buckets[day.strftime("%Y-%m")][day.strftime("%d")] = rng.randint(0, 40)
+        batch = [
+            {"_id": bucket_id(item_id, month), "item_id": item_id, "month": month,
+             "days": counts, "total": sum(counts.values())}
+            for month, counts in buckets.items()
+        ]
+        if batch:
+            await db.sales.insert_many(batch)
+
+    hashed = await hasher.hash(PASSWORD)
+    await db.users.insert_many([
+        {"username": f"user{n}", "email": f"user{n}@example.com", "password": hashed}
+        for n in range(USERS)
+    ])
+    return [str(i) for i in ids]
+
+# ---- workloads: each returns the response of one request ----
+async def wl_list(client, ids, rng):
+    return await client.get("/api/inventory/", params={"limit": 100})
+
+async def wl_get(client, ids, rng):
+    return await client.get(f"/api/inventory/{rng.choice(ids)}")
+
+async def wl_adjust(client, ids, rng):
+    return await client.patch(
+        f"/api/inventory/{rng.choice(ids)}/sales/adjust",
+        json={"date": date.today().isoformat(), "change": 1},
+    )
+
+async def wl_login(client, ids, rng):
+    n = rng.randrange(USERS)
+    return await client.post(
+        "/api/auth/login", json={"email": f"user{n}@example.com", "password": PASSWORD}
+    )
+
+WORKLOADS = {"list": wl_list, "get": wl_get, "adjust": wl_adjust, "login": wl_login}
+
+async def run_load(client, ids, mix: dict, total: int, concurrency: int, rng: random.Random):
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[n] for n in names], k=total)
+    latencies, errors = defaultdict(list), defaultdict(int)
+    queue = iter(plan)
+
+    async def worker(worker_rng):
+        for name in queue:
+            start = time.perf_counter()
+            try:
+                res = await WORKLOADS[name](client, ids, worker_rng)
+                failed = res.status_code >= 400
+            except Exception:
+                failed = True
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if failed:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(rng.random())) for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def summarize(samples: list, errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s"
+            )
+    return regressions
+
+def print_report(report: dict):
+    print(f"{'endpoint':<10}{'reqs':>8}{'errs':>6}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, row in {**report["endpoints"], "TOTAL": report["total"]}.items():
+        print(
+            f"{name:<10}{row['requests']:>8}{row['errors']:>6}{row['throughput_rps']:>10}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+        )
+
+async def bench(args, mongo_uri: str) -> dict:
+    apply_env({"MONGO_URI": mongo_uri, "DB_NAME": args.db_name, **args.env})
+    import httpx
+    from app.core.database import db
+    from main import app
+
+    rng = random.Random(args.seed)
+    async with app.router.lifespan_context(app):
+        seed_start = time.perf_counter()
+        ids = await seed(db, args.items, args.days, rng)
+        seed_seconds = time.perf_counter() - seed_start
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if args.warmup:
+                await run_load(client, ids, args.mix, args.warmup, args.concurrency, rng)
+            latencies, errors, elapsed = await run_load(
+                client, ids, args.mix, args.requests, args.concurrency, rng
+            )
+        if args.drop:
+            await db.client.drop_database(args.db_name)
+
+    all_samples = [s for samples in latencies.values() for s in samples]
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "items": args.items,
+            "days": args.days,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed": args.seed,
+            "env": args.env,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "endpoints": {
+            name: summarize(samples, errors[name], elapsed)
+            for name, samples in sorted(latencies.items())
+        },
+        "total": summarize(all_samples, sum(errors.values()), elapsed),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the inventory API.")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90, help="days of sales history per item")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("list=4,get=4,adjust=2,login=1"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo-uri", help="use this server instead of starting a local mongod")
+    parser.add_argument("--mongod", default="mongod", help="mongod binary for the local fixture")
+    parser.add_argument(
+        "--replset", action="store_true",
+        help="run the local mongod as a single-node replica set (enables the change-stream watcher)",
+    )
+    parser.add_argument("--db-name", default="inventory_bench")
+    parser.add_argument("--keep", dest="drop", action="store_false", help="keep the seeded database")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE",
+        help="extra settings, e.g. --env ITEM_CACHE_TTL_SECONDS=0 (repeatable)",
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    args.env = dict(item.split("=", 1) for item in args.env)
+
+    fixture = (
+        contextlib.nullcontext(args.mongo_uri) if args.mongo_uri else local_mongod(args.mongod, replset=args.replset)
+    )
+    with fixture as mongo_uri:
+        report = asyncio.run(bench(args, mongo_uri))
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
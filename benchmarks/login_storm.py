@@ -0,0 +1,70 @@
+# benchmarks/login_storm.py
+"""
+Event-loop latency during a login storm, bcrypt inline vs. in the worker pool.
+
+A steady stream of probe requests (a stand-in for /api/inventory: a short
+awaited I/O wait) runs on the loop while `--logins` concurrent password
+verifications are in flight. Inline bcrypt blocks the loop, so probe latency
+climbs with the storm; the pooled hasher keeps it flat.
+
+    python -m benchmarks.login_storm --logins 50 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from benchmarks.common import apply_env, percentile
+
+apply_env()
+
+PROBE_IO_SECONDS = 0.002
+PROBE_INTERVAL_SECONDS = 0.005
+
+async def probe_until(done: asyncio.Event, samples: list):
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_IO_SECONDS)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+async def storm(verify, logins: int, hashed: str) -> list:
+    done, samples = asyncio.Event(), []
+    prober = asyncio.create_task(probe_until(done, samples))
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(verify("correct horse", hashed) for _ in range(logins)))
+    done.set()
+    await prober
+    return samples
+
+def report(label: str, samples: list):
+    print(
+        f"{label:<8} probes={len(samples):<5} "
+        f"p50={statistics.median(samples):7.2f}ms "
+        f"p99={percentile(samples, 99):8.2f}ms "
+        f"max={max(samples):8.2f}ms"
+    )
+
+async def main(args):
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_MAX_QUEUE"] = str(args.logins)
+    from app.core.hashing import _verify_and_update, hasher, pwd_context
+
+    hashed = pwd_context.hash("correct horse")
+
+    async def inline(plain, stored):
+        return _verify_and_update(plain, stored)
+
+    baseline = await storm(lambda *a: asyncio.sleep(0), 1, hashed)
+    report("idle", baseline)
+    report("inline", await storm(inline, args.logins, hashed))
+    report("pooled", await storm(hasher.verify_and_update, args.logins, hashed))
+    hasher.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+# benchmarks/mongod.py
+"""
+Throwaway local mongod for benchmarks: temp data dir, free port, torn down on exit.
+With replset=True it runs as a single-node replica set, which change streams
+(the /api/inventory/stream WebSocket) require.
+"""
+import contextlib
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+REPLSET = "rs0"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_for_ping(uri: str, proc: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        if proc.poll() is not None:
+            raise RuntimeError(f"mongod exited with status {proc.returncode}")
+        try:
+            with MongoClient(uri, serverSelectionTimeoutMS=500, directConnection=True) as client:
+                client.admin.command("ping")
+                return
+        except PyMongoError:
+            if time.monotonic() > deadline:
+                raise
+
+def _initiate_replset(uri: str, port: int, timeout: float):
+    with MongoClient(uri, directConnection=True) as client:
+        client.admin.command("replSetInitiate", {
+            "_id": REPLSET, "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}],
+        })
+        deadline = time.monotonic() + timeout
+        while not client.admin.command("hello").get("isWritablePrimary"):
+            if time.monotonic() > deadline:
+                raise RuntimeError("replica set did not elect a primary")
+            time.sleep(0.2)
+
+@contextlib.contextmanager
+def local_mongod(binary: str = "mongod", timeout: float = 30, replset: bool = False):
+    """Yield the URI of a fresh mongod started from `binary`."""
+    if shutil.which(binary) is None:
+        raise RuntimeError(f"{binary!r} not found; install MongoDB or pass --mongo-uri")
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    port = _free_port()
+    args = [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"]
+    if replset:
+        args += ["--replSet", REPLSET]
+    proc = subprocess.Popen(
+        args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        _wait_for_ping(uri, proc, timeout)
+        if replset:
+            _initiate_replset(uri, port, timeout)
+            uri += "/?directConnection=true"
+        yield uri
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(dbpath, ignore_errors=True)
@@ -0,0 +1,75 @@
+# benchmarks/serialization.py
+"""
+Per-item serialization cost of a list_items page, old path vs. fast path.
+
+old:  doc["id"] = str(doc["_id"]); InventoryItemDB(**doc) for every document,
+      then FastAPI's response_model validation + jsonable_encoder + json.dumps
+      (what a List[InventoryItemDB] route returning models does).
+fast: item_to_dict(doc) + one orjson.dumps of the page.
+
+    python -m benchmarks.serialization --items 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import copy
+import time
+from typing import List
+from bson import ObjectId
+from benchmarks.common import apply_env
+
+apply_env()
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.core.serialization import dumps, item_to_dict
+from app.models.inventory import InventoryItemDB
+
+def make_docs(count: int) -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Assam breakfast {n}",
+            "quantity": 100 + n,
+            "price": 4.5 + n / 100,
+            "description": "Strong black tea, 250 g tin",
+            "version": 3,
+        }
+        for n in range(count)
+    ]
+
+async def old_path(docs: list, field) -> bytes:
+    items = []
+    for doc in docs:
+        doc["id"] = str(doc["_id"])
+        items.append(InventoryItemDB(**doc))
+    content = await serialize_response(field=field, response_content=items, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def fast_path(docs: list, field) -> bytes:
+    return dumps([item_to_dict(doc) for doc in docs])
+
+async def measure(fn, docs: list, repeat: int, field) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        batch = copy.deepcopy(docs)  # both paths see fresh Mongo-shaped documents
+        start = time.perf_counter()
+        await fn(batch, field)
+        best = min(best, time.perf_counter() - start)
+    return best / len(docs) * 1_000_000
+
+async def main(args):
+    docs = make_docs(args.items)
+    field = create_model_field(name="Response_list_items", type_=List[InventoryItemDB])
+    old = await measure(old_path, docs, args.repeat, field)
+    fast = await measure(fast_path, docs, args.repeat, field)
+    print(f"items per page: {args.items}, best of {args.repeat}")
+    print(f"old  (model + response_model + json): {old:8.2f} us/item")
+    print(f"fast (item_to_dict + orjson)        : {fast:8.2f} us/item")
+    print(f"speed-up: {old / fast:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -1,19 +1,53 @@
 # main.py
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from app.core import database
+from app.core.config import settings
 from app.core.database import db
-from app.routers import auth, inventory
+from app.core.changes import watcher
+from app.core.coalescer import coalescer
+from app.core.hashing import hasher
+from app.core import metrics
+from app.routers import analytics, auth, inventory
 
-app = FastAPI(title="Tea Shop Inventory API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.connect(event_listeners=[metrics.CommandTimer(settings.mongo_slow_command_ms)])
+    await database.ensure_indexes()
+    if settings.mongo_explain_on_startup:
+        await database.check_query_plans()
+    coalescer.start()
+    if settings.inventory_stream_enabled:
+        watcher.start()
+    yield
+    await watcher.stop()
+    await coalescer.stop()
+    hasher.shutdown()
+    database.close()
+
+app = FastAPI(
+    title="Tea Shop Inventory API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(inventory.router)
+app.include_router(analytics.router)
 
 @app.get("/ping")
 async def ping_db():
     res = await db.command("ping")
     return {"mongo_ok": res.get("ok")}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
 
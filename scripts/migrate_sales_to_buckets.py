@@ -0,0 +1,86 @@
+# scripts/migrate_sales_to_buckets.py
+"""
+Move the legacy `sales.<YYYY-MM-DD>` map out of inventory documents and into
+the monthly buckets in db.sales (see app/core/sales.py).
+
+    python -m scripts.migrate_sales_to_buckets
+
+Safe to run while the API is serving and safe to re-run: each legacy day is
+merged into its bucket at most once (guarded by `legacy_days`), then the
+merged keys are removed from the item. Counts the API wrote to the bucket in
+the meantime are kept and added to.
+
+Keys that are not valid dates (e.g. "2025-7-1") are left in the item's legacy
+map and reported, so they can be corrected by hand and the script re-run.
+"""
+import asyncio
+from collections import defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core import database
+from app.core.database import db
+from app.core.sales import bucket_id, split_date
+
+async def migrate_item(doc: dict) -> int:
+    """Merge one item's legacy map; returns how many keys were left in place."""
+    months = defaultdict(dict)
+    merged, skipped = [], 0
+    for raw_date, count in doc["sales"].items():
+        try:
+            month, day = split_date(raw_date)
+        except ValueError:
+            skipped += 1
+            continue
+        months[month][day] = months[month].get(day, 0) + count
+        merged.append(raw_date)
+
+    ops = [
+        UpdateOne(
+            {
+                "_id": bucket_id(doc["_id"], month),
+                "legacy_merged": {"$ne": True},  # whole month merged by an older run
+                "legacy_days": {"$nin": list(days)},
+            },
+            {
+                "$inc": {**{f"days.{d}": c for d, c in days.items()}, "total": sum(days.values())},
+                "$addToSet": {"legacy_days": {"$each": list(days)}},
+                "$setOnInsert": {"item_id": doc["_id"], "month": month},
+            },
+            upsert=True,
+        )
+        for month, days in months.items()
+    ]
+    if ops:
+        try:
+            await db.sales.bulk_write(ops, ordered=False)
+        except BulkWriteError as exc:
+            # A duplicate key means those days were merged by an earlier run.
+            if any(err["code"] != 11000 for err in exc.details["writeErrors"]):
+                raise
+    if not skipped:
+        await db.inventory.update_one({"_id": doc["_id"]}, {"$unset": {"sales": ""}})
+    elif merged:
+        await db.inventory.update_one(
+            {"_id": doc["_id"]}, {"$unset": {f"sales.{raw_date}": "" for raw_date in merged}}
+        )
+    return skipped
+
+async def main():
+    database.connect()
+    migrated = skipped = 0
+    left = []
+    async for doc in db.inventory.find({"sales": {"$exists": True}}, {"sales": 1}):
+        item_skipped = await migrate_item(doc)
+        if item_skipped:
+            skipped += item_skipped
+            left.append(str(doc["_id"]))
+        migrated += 1
+    database.close()
+    print(f"Migrated {migrated} items")
+    if left:
+        print(f"Left {skipped} malformed dates in place on {len(left)} items; fix them and re-run:")
+        for item_id in left:
+            print(f"  {item_id}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+# scripts/rebuild_sales_summary.py
+"""
+Rebuild db.sales_summary from the sales buckets.
+
+    python -m scripts.rebuild_sales_summary
+
+Run once after migrate_sales_to_buckets, or whenever the summaries need to be
+recomputed. Revenue is recomputed at each item's current price, and sales of
+deleted items are dropped along with their buckets. Run it while sales are
+quiet: writes that land during the rebuild can be counted twice or missed.
+"""
+import asyncio
+from app.core import database
+from app.core.database import db
+
+def _pipeline(period: str, prefix: str) -> list:
+    return [
+        {"$project": {"item_id": 1, "month": 1, "days": {"$objectToArray": "$days"}}},
+        {"$unwind": "$days"},
+        {"$lookup": {
+            "from": "inventory",
+            "localField": "item_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"price": 1}}],
+            "as": "item",
+        }},
+        {"$project": {
+            "item": {"$toString": "$item_id"},
+            "period": period,
+            "units": "$days.v",
+            "revenue": {"$multiply": ["$days.v", {"$ifNull": [{"$first": "$item.price"}, 0]}]},
+        }},
+        {"$group": {
+            "_id": {"period": "$period", "item": "$item"},
+            "units": {"$sum": "$units"},
+            "revenue": {"$sum": "$revenue"},
+        }},
+        {"$group": {
+            "_id": {"$concat": [prefix, "$_id.period"]},
+            "units": {"$sum": "$units"},
+            "revenue": {"$sum": "$revenue"},
+            "items": {"$push": {"k": "$_id.item", "v": "$units"}},
+        }},
+        {"$set": {"items": {"$arrayToObject": "$items"}}},
+        {"$merge": {"into": "sales_summary", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+async def main():
+    database.connect()
+    await db.sales_summary.delete_many({})
+    await db.sales.aggregate(
+        _pipeline({"$concat": ["$month", "-", "$days.k"]}, "d:")
+    ).to_list(length=None)
+    await db.sales.aggregate(_pipeline("$month", "m:")).to_list(length=None)
+    count = await db.sales_summary.count_documents({})
+    database.close()
+    print(f"Rebuilt {count} summary documents")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+
+# Settings() is built at import time; the tests never reach a real server.
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1")
+os.environ.setdefault("DB_NAME", "inventory_test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
@@ -0,0 +1,177 @@
+# tests/test_coalescer.py
+"""Sales coalescer flushes against a slow in-memory stand-in for Motor."""
+import asyncio
+from bson import ObjectId
+import pytest
+from pymongo.errors import AutoReconnect
+from app.core import coalescer as coalescer_module
+from app.core import sales
+from app.core.coalescer import SalesCoalescer
+
+WRITE_DELAY = 0.05
+
+def raise_once(collection):
+    error, collection.fail_after_write = collection.fail_after_write, None
+    if error is not None:
+        raise error
+
+class FakeInventory:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.fail_after_write = None  # raised once, after the writes are applied
+
+    @staticmethod
+    def _matches(doc, filter_q):
+        for field, cond in filter_q.items():
+            value = doc.get(field)
+            if isinstance(cond, dict):
+                if "$gte" in cond and not value >= cond["$gte"]:
+                    return False
+                if "$in" in cond and value not in cond["$in"]:
+                    return False
+            elif value != cond:
+                return False
+        return True
+
+    def _apply(self, filter_q, update):
+        doc = self.docs.get(filter_q["_id"])
+        if doc is None or not self._matches(doc, filter_q):
+            return None
+        for field, units in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + units
+        return doc
+
+    async def find_one_and_update(self, filter_q, update, **kwargs):
+        await asyncio.sleep(WRITE_DELAY)
+        doc = self._apply(filter_q, update)
+        return dict(doc) if doc is not None else None
+
+    async def bulk_write(self, ops, ordered=True):
+        await asyncio.sleep(WRITE_DELAY)
+        for op in ops:
+            self._apply(op._filter, op._doc)
+        raise_once(self)
+
+class FakeWrites:
+    def __init__(self):
+        self.ops = []
+        self.fail_after_write = None
+
+    async def bulk_write(self, ops, ordered=True):
+        await asyncio.sleep(WRITE_DELAY)
+        self.ops.extend(ops)
+        raise_once(self)
+
+class FakeDatabase:
+    def __init__(self, docs):
+        self.inventory = FakeInventory(docs)
+        self.sales = FakeWrites()
+        self.sales_summary = FakeWrites()
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    item = {"_id": ObjectId(), "name": "sencha", "quantity": 100, "price": 4.0, "version": 1}
+    database = FakeDatabase([item])
+    monkeypatch.setattr(coalescer_module, "db", database)
+    monkeypatch.setattr(sales, "db", database)
+    return database, item["_id"]
+
+def sold_units(database):
+    return sum(op._doc["$inc"]["total"] for op in database.sales.ops)
+
+def test_stop_waits_for_the_flush_in_progress(fake_db):
+    database, obj = fake_db
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=10, lease_size=20)
+        coalescer.start()
+        for _ in range(5):
+            assert await coalescer.sell(obj, "2025-07-01", 1) is not None
+        await asyncio.sleep(0.03)  # the periodic flush is now mid-write
+        await coalescer.stop()
+
+    asyncio.run(scenario())
+    assert sold_units(database) == 5
+    assert database.inventory.docs[obj]["quantity"] == 95
+
+def test_cancelled_flush_still_writes_everything(fake_db):
+    database, obj = fake_db
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=1000, lease_size=20)
+        coalescer.start()
+        for _ in range(5):
+            await coalescer.sell(obj, "2025-07-01", 1)
+        flush = asyncio.create_task(coalescer.flush())
+        await asyncio.sleep(WRITE_DELAY / 2)
+        flush.cancel()
+        await coalescer.stop()
+
+    asyncio.run(scenario())
+    assert sold_units(database) == 5
+    assert database.inventory.docs[obj]["quantity"] == 95
+
+def override(database, obj, quantity):
+    """What set_quantity does, e.g. from another worker."""
+    doc = database.inventory.docs[obj]
+    doc["quantity"] = quantity
+    doc["stock_epoch"] = doc.get("stock_epoch", 0) + 1
+
+def test_override_voids_stock_leased_before_it(fake_db):
+    database, obj = fake_db
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=1000, lease_size=20)
+        await coalescer.sell(obj, "2025-07-01", 5)
+        override(database, obj, 50)
+        await coalescer.flush()
+
+    asyncio.run(scenario())
+    assert sold_units(database) == 5
+    assert database.inventory.docs[obj]["quantity"] == 50
+
+def test_lease_topped_up_after_override_returns_only_new_stock(fake_db):
+    database, obj = fake_db
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=1000, lease_size=20)
+        await coalescer.sell(obj, "2025-07-01", 15)
+        override(database, obj, 50)
+        # 5 units left of the old lease are void, so this leases 20 afresh.
+        updated = await coalescer.sell(obj, "2025-07-01", 10)
+        assert updated["quantity"] == 40
+        await coalescer.flush()
+
+    asyncio.run(scenario())
+    assert sold_units(database) == 25
+    assert database.inventory.docs[obj]["quantity"] == 40
+
+def test_stock_returned_with_unknown_outcome_is_not_returned_again(fake_db):
+    database, obj = fake_db
+    database.inventory.fail_after_write = AutoReconnect("connection reset")
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=1000, lease_size=20)
+        await coalescer.sell(obj, "2025-07-01", 5)
+        with pytest.raises(AutoReconnect):
+            await coalescer.flush()
+        await coalescer.flush()  # the sales were never sent, so they are retried
+
+    asyncio.run(scenario())
+    assert database.inventory.docs[obj]["quantity"] == 95
+    assert sold_units(database) == 5
+
+def test_sales_written_with_unknown_outcome_are_not_written_again(fake_db):
+    database, obj = fake_db
+    database.sales.fail_after_write = AutoReconnect("connection reset")
+
+    async def scenario():
+        coalescer = SalesCoalescer(window_ms=1000, lease_size=20)
+        await coalescer.sell(obj, "2025-07-01", 5)
+        with pytest.raises(AutoReconnect):
+            await coalescer.flush()
+        await coalescer.flush()
+
+    asyncio.run(scenario())
+    assert database.inventory.docs[obj]["quantity"] == 95
+    assert sold_units(database) == 5
@@ -0,0 +1,190 @@
+# tests/test_sales_batch.py
+"""POST /api/inventory/sales/adjust/batch against an in-memory stand-in for Motor."""
+import asyncio
+import itertools
+from bson import ObjectId
+import pytest
+from pymongo import ReturnDocument
+from app.core import sales
+from app.routers import inventory
+from app.routers.inventory import SalesAdjustBatch, _apply_changes, _changes_pipeline
+
+def evaluate(expr, doc, variables=None):
+    """The aggregation operators the batch pipeline uses, and nothing more."""
+    variables = variables or {}
+
+    def ev(e, **extra):
+        return evaluate(e, doc, {**variables, **extra})
+
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, *path = expr[2:].split(".")
+        value = variables[name]
+        for part in path:
+            value = value[part]
+        return value
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [ev(e) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {key: ev(value) for key, value in expr.items()}
+    op, arg = next(iter(expr.items()))
+    if op == "$cond":
+        return ev(arg[1]) if ev(arg[0]) else ev(arg[2])
+    if op == "$and":
+        return all(ev(a) for a in arg)
+    if op == "$or":
+        return any(ev(a) for a in arg)
+    if op == "$not":
+        return not ev(arg[0])
+    if op == "$lte":
+        a, b = ev(arg)
+        return a <= b
+    if op == "$gte":
+        a, b = ev(arg)
+        return a >= b
+    if op == "$subtract":
+        a, b = ev(arg)
+        return a - b
+    if op == "$add":
+        return sum(ev(arg))
+    if op == "$ifNull":
+        value = ev(arg[0])
+        return ev(arg[1]) if value is None else value
+    if op == "$let":
+        return ev(arg["in"], **{name: ev(value) for name, value in arg["vars"].items()})
+    if op == "$reduce":
+        value = ev(arg["initialValue"])
+        for this in ev(arg["input"]):
+            value = ev(arg["in"], value=value, this=this)
+        return value
+    raise NotImplementedError(op)
+
+def run_pipeline(doc, pipeline):
+    for stage in pipeline:
+        doc = {**doc, **{field: evaluate(expr, doc) for field, expr in stage["$set"].items()}}
+    return doc
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+class FakeInventory:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.before_write = None  # called once, just before the next write
+
+    def find(self, filter_q, projection=None):
+        wanted = filter_q["_id"]["$in"]
+        return FakeCursor([doc for _id, doc in self.docs.items() if _id in wanted])
+
+    async def find_one_and_update(self, filter_q, update, projection=None, return_document=None):
+        await asyncio.sleep(0)
+        hook, self.before_write = self.before_write, None
+        if hook is not None:
+            hook()
+        doc = self.docs.get(filter_q["_id"])
+        guard = filter_q.get("quantity", {}).get("$gte")
+        if doc is None or (guard is not None and doc["quantity"] < guard):
+            return None
+        before = dict(doc)
+        if isinstance(update, list):
+            doc.update(run_pipeline(doc, update))
+        else:
+            for field, units in update["$inc"].items():
+                doc[field] = doc.get(field, 0) + units
+        return before if return_document == ReturnDocument.BEFORE else dict(doc)
+
+class FakeWrites:
+    def __init__(self):
+        self.ops = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+class FakeDatabase:
+    def __init__(self, docs):
+        self.inventory = FakeInventory(docs)
+        self.sales = FakeWrites()
+        self.sales_summary = FakeWrites()
+
+@pytest.fixture
+def shop(monkeypatch):
+    a = {"_id": ObjectId(), "name": "sencha", "quantity": 3, "price": 4.0, "version": 1}
+    b = {"_id": ObjectId(), "name": "hojicha", "quantity": 5, "price": 3.0, "version": 1}
+    database = FakeDatabase([a, b])
+    monkeypatch.setattr(inventory, "db", database)
+    monkeypatch.setattr(sales, "db", database)
+    return database, str(a["_id"]), str(b["_id"])
+
+def adjust(entries, ordered=False):
+    body = SalesAdjustBatch(
+        entries=[{"item_id": item_id, "date": "2025-07-01", "change": change} for item_id, change in entries],
+        ordered=ordered,
+    )
+    return asyncio.run(inventory.adjust_sales_batch(body))
+
+def outcome(result):
+    return [(r.ok, r.error, r.quantity) for r in result.results]
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_pipeline_matches_replay(ordered):
+    for start in range(4):
+        for changes in itertools.product([-1, 0, 1, 2, 3], repeat=3):
+            after = run_pipeline({"quantity": start, "version": 1}, _changes_pipeline(list(changes), ordered))
+            assert after["quantity"] == _apply_changes(start, list(changes), ordered)[1]
+            assert after["version"] == 2
+
+def test_unordered_reports_each_entry(shop):
+    database, a, b = shop
+    missing = str(ObjectId())
+    result = adjust([(a, 2), (a, 2), ("bad", 1), (missing, 1), (b, 1), (a, -1)])
+
+    assert outcome(result) == [
+        (True, None, 2),
+        (False, "Insufficient stock", 2),
+        (False, "Invalid item id", None),
+        (False, "Item not found", None),
+        (True, None, 4),
+        (True, None, 2),
+    ]
+    assert (result.succeeded, result.failed) == (3, 3)
+    assert ObjectId(missing) not in database.inventory.docs  # no stub documents
+    assert len(database.sales.ops) == 3
+
+def test_ordered_stops_at_first_failure(shop):
+    database, a, b = shop
+    result = adjust([(a, 2), (b, 1), (a, 2), (b, 1)], ordered=True)
+
+    assert outcome(result) == [
+        (True, None, 1),
+        (True, None, 4),
+        (False, "Insufficient stock", 1),
+        (False, "Not attempted", 4),
+    ]
+    assert database.inventory.docs[ObjectId(b)]["quantity"] == 4
+
+def test_ordered_reverses_entries_past_an_unexpected_failure(shop):
+    database, a, b = shop
+
+    def concurrent_sale():
+        database.inventory.docs[ObjectId(a)]["quantity"] = 1
+
+    database.inventory.before_write = concurrent_sale
+    result = adjust([(a, 2), (b, 1)], ordered=True)
+
+    assert outcome(result) == [
+        (False, "Insufficient stock", 1),
+        (False, "Not attempted", 5),
+    ]
+    assert database.inventory.docs[ObjectId(b)]["quantity"] == 5
+    assert database.sales.ops == []